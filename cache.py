@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simple filesystem cache for API responses, keyed by query + page.
+"""
+import gzip
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = Path(".cache")
+DEFAULT_TTL_SECONDS = 3600  # 1 hour
+
+
+class ResponseCache:
+    """Caches decoded JSON responses on disk so repeated runs within the
+    TTL skip refetching pages that haven't changed."""
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        """Initialize the cache, creating its directory if needed."""
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path_for(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.json.gz"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for `key`, or None if missing or stale."""
+        path = self._path_for(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, data: Dict[str, Any]) -> None:
+        """Store a decoded response for `key`, ignoring write failures."""
+        path = self._path_for(key)
+        try:
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                json.dump(data, f)
+        except OSError:
+            pass  # A broken cache should never break the fetch
@@ -4,15 +4,20 @@
 Fetches a user's merged GitHub Pull Requests for the year and formats
 them for an LLM prompt.
 """
+import asyncio
 import os
+import re
 import sys
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 import httpx
+import orjson
 from dotenv import load_dotenv
 
+from cache import ResponseCache
+
 
 @dataclass(frozen=True)
 class Config:
@@ -37,6 +42,21 @@ class Config:
         return cls(**{k: v for k, v in required_vars.items() if v is not None})
 
 
+MAX_CONCURRENT_REQUESTS = 8
+
+# GitHub Search caps results at 1000, i.e. 10 pages of 100
+MAX_SEARCH_PAGES = 10
+
+# Transient statuses worth retrying with backoff
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 3
+
+# Keep connections alive so paginated calls multiplex over one TLS session
+CLIENT_LIMITS = httpx.Limits(
+    max_keepalive_connections=20, max_connections=50, keepalive_expiry=30
+)
+
+
 class GitHubService:
     """A service class to interact with the GitHub API."""
     BASE_URL = "https://api.github.com"
@@ -48,78 +68,144 @@ class GitHubService:
             "Accept": "application/vnd.github.v3+json",
             "Authorization": f"Bearer {self.config.github_token}",
         }
+        self.cache = ResponseCache()
+        # One client per service instance so the connection pool survives
+        # across fetch calls
+        self._client = httpx.AsyncClient(
+            headers=self.headers, http2=True, timeout=30.0, limits=CLIENT_LIMITS
+        )
+
+    async def __aenter__(self) -> "GitHubService":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
 
-    def fetch_merged_prs_for_year(self) -> List[Dict[str, Any]]:
-        """Fetch all pages of merged Pull Requests for the current year."""
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        await self._client.aclose()
+
+    async def fetch_merged_prs_for_year(self) -> List[Dict[str, Any]]:
+        """Fetch all pages of merged Pull Requests for the current year.
+
+        The first request reveals the total result count, so the remaining
+        pages are fetched concurrently instead of one at a time.
+        """
         current_year = datetime.now().year
         query = (
             f"is:pr author:{self.config.github_username} is:merged "
             f"merged:{current_year}-01-01..{current_year}-12-31"
         )
         search_url = f"{self.BASE_URL}/search/issues"
-        all_prs: List[Dict[str, Any]] = []
-        page = 1
         per_page = 100  # Max is 100
 
         print("Fetching your merged GitHub pull requests for the year...", file=sys.stderr)
-        with httpx.Client(headers=self.headers, timeout=30.0) as client:
-            while True:
-                params = {"q": query, "per_page": per_page, "page": page}
-                try:
-                    response = client.get(search_url, params=params)
-                    response.raise_for_status()
-                except httpx.HTTPStatusError as e:
-                    print(f"HTTP Error: {e.response.status_code} - {e.response.text}")
-                    raise
-                except httpx.RequestError as e:
-                    print(f"API Request Failed: {e}")
-                    raise
-
-                data = response.json()
-                prs_on_page = data.get("items", [])
-                if not prs_on_page:
-                    break  # No more results
-
-                all_prs.extend(prs_on_page)
-                total_count = data.get("total_count", 0)
+        client = self._client
+        # Cap concurrent requests so parallel pagination stays under
+        # GitHub's secondary rate limits
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async def fetch_page(page: int) -> Dict[str, Any]:
+            cache_key = f"github:{query}:{page}"
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            params = {"q": query, "per_page": per_page, "page": page}
+            async with semaphore:
+                # Retry transient failures with exponential backoff,
+                # honoring Retry-After when the server sends one
+                for attempt in range(MAX_ATTEMPTS):
+                    try:
+                        response = await client.get(search_url, params=params)
+                        if (
+                            response.status_code in RETRYABLE_STATUSES
+                            and attempt < MAX_ATTEMPTS - 1
+                        ):
+                            await asyncio.sleep(
+                                float(response.headers.get("Retry-After", 2 ** attempt))
+                            )
+                            continue
+                        response.raise_for_status()
+                        break
+                    except httpx.HTTPStatusError as e:
+                        print(f"HTTP Error: {e.response.status_code} - {e.response.text}")
+                        raise
+                    except httpx.RequestError as e:
+                        if attempt < MAX_ATTEMPTS - 1:
+                            await asyncio.sleep(2 ** attempt)
+                            continue
+                        print(f"API Request Failed: {e}")
+                        raise
+            # orjson decodes large search pages several times faster
+            # than the stdlib json used by response.json()
+            data = orjson.loads(response.content)
+            self.cache.set(cache_key, data)
+            return data
+
+        first_page = await fetch_page(1)
+        all_prs: List[Dict[str, Any]] = first_page.get("items", [])
+
+        # The first page's total_count is all we need to plan the rest;
+        # the search cap bounds the page count
+        total_count = first_page.get("total_count", 0)
+        num_pages = min((total_count + per_page - 1) // per_page, MAX_SEARCH_PAGES)
+        total_count = min(total_count, MAX_SEARCH_PAGES * per_page)
+        print(f"\rFetched {len(all_prs)} of {total_count} PRs...", end="", file=sys.stderr)
+
+        if num_pages > 1:
+            # return_exceptions keeps one failed page (post-retries) from
+            # cancelling its siblings and losing all fetched work
+            pages = await asyncio.gather(
+                *(fetch_page(page) for page in range(2, num_pages + 1)),
+                return_exceptions=True,
+            )
+            for page_num, data in enumerate(pages, 2):
+                if isinstance(data, BaseException):
+                    print(f"\nWarning: skipping page {page_num}: {data}", file=sys.stderr)
+                    continue
+                all_prs.extend(data.get("items", []))
                 print(f"\rFetched {len(all_prs)} of {total_count} PRs...", end="", file=sys.stderr)
 
-                # GitHub Search API caps results at 1000, so we stop if we have them all
-                if len(all_prs) >= total_count:
-                    break
-                page += 1
-
         print("\nAll PRs fetched. Now formatting...", file=sys.stderr)
         return all_prs
 
 
-def format_prs_for_llm(prs: List[Dict[str, Any]], config: Config) -> str:
-    """Format the fetched GitHub PRs into a single string for the LLM."""
-    if not prs:
+def iter_pr_chunks(prs: List[Dict[str, Any]], config: Config) -> Iterator[str]:
+    """Yield one formatted LLM-prompt entry per fetched GitHub PR.
+
+    Yielding entries lets the caller stream them to disk instead of
+    holding the whole formatted output in memory.
+    """
+    # Filter by configured GitHub organization first so the sort only
+    # touches PRs that will actually be formatted. A compiled
+    # case-insensitive regex avoids lowercasing every URL
+    org_re = re.compile(re.escape(config.github_org_filter), re.IGNORECASE)
+    filtered = [pr for pr in prs if org_re.search(pr["repository_url"])]
+    if not filtered:
         print("No merged PRs found for the year.")
-        return ""
-
-    consolidated_data = []
-    i = 1
-    for pr in sorted(prs, key=lambda x: x["closed_at"], reverse=True):
-        # Filter by configured GitHub organization
-        repo_name = pr["repository_url"].split("/")[-2] + "/" + pr["repository_url"].split("/")[-1]
-        if config.github_org_filter.lower() not in repo_name.lower():
-            continue
-        
-        entry = [
-            f"--- github {i} ---",
-            f"Repo: {repo_name}",
-            f"PR #{pr['number']}: {pr['title']}",
-            f"Merged On: {pr['closed_at'][:10]}",
-            f"URL: {pr['html_url']}\n",
-            "Description:",
-            pr["body"] or "No description provided.",
-        ]
-        i += 1
-        consolidated_data.append("\n".join(entry))
-
-    return "\n\n".join(consolidated_data)
+        return
+    filtered.sort(key=lambda x: x["closed_at"], reverse=True)
+
+    for i, pr in enumerate(filtered, 1):
+        parts = pr["repository_url"].rsplit("/", 2)
+        repo_name = f"{parts[-2]}/{parts[-1]}"
+
+        yield (
+            f"--- github {i} ---\n"
+            f"Repo: {repo_name}\n"
+            f"PR #{pr['number']}: {pr['title']}\n"
+            f"Merged On: {pr['closed_at'][:10]}\n"
+            f"URL: {pr['html_url']}\n\n"
+            "Description:\n"
+            f"{pr['body'] or 'No description provided.'}"
+        )
+
+
+async def fetch_prs(config: Config) -> List[Dict[str, Any]]:
+    """Fetch merged PRs, closing the service's client when done."""
+    async with GitHubService(config) as github_service:
+        return await github_service.fetch_merged_prs_for_year()
 
 
 def main() -> int:
@@ -127,18 +213,24 @@ def main() -> int:
     try:
         # NOTE: Your .env file should now have GITHUB_TOKEN, GITHUB_USERNAME, and GITHUB_ORG_FILTER
         config = Config.from_env()
-        github_service = GitHubService(config)
 
-        all_prs = github_service.fetch_merged_prs_for_year()
-        github_output = format_prs_for_llm(all_prs, config)
+        all_prs = asyncio.run(fetch_prs(config))
 
-        if github_output:
+        # Stream entries to disk as they are formatted rather than
+        # building the whole output string first
+        chunks = iter_pr_chunks(all_prs, config)
+        first_chunk = next(chunks, None)
+        if first_chunk is not None:
             current_date = datetime.now().strftime('%Y-%m-%d')
             filename = f"github_contributions_{current_date}.txt"
 
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(github_output)
-
+            # Binary mode skips TextIOWrapper's incremental encoder;
+            # each chunk is encoded once and written as-is
+            with open(filename, "wb") as f:
+                f.write(first_chunk.encode("utf-8"))
+                for chunk in chunks:
+                    f.write(b"\n\n")
+                    f.write(chunk.encode("utf-8"))
             print(f"\nSuccessfully wrote contribution data to '{filename}'", file=sys.stderr)
         return 0
     except (ValueError, httpx.RequestError) as e:
@@ -3,15 +3,21 @@
 """
 Fetches completed Jira tickets for the year and formats them for an LLM prompt.
 """
+import asyncio
+import html
 import os
+import re
 import sys
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 import httpx
+import orjson
 from datetime import datetime
 from dotenv import load_dotenv
 
+from cache import ResponseCache
+
 
 
 @dataclass(frozen=True)
@@ -44,142 +50,291 @@ class Config:
         return cls(**{k: v for k, v in required_vars.items() if v is not None})
 
 
+MAX_CONCURRENT_REQUESTS = 8
+
+# Only the most recent comments per issue are worth showing the LLM;
+# capping here also skips ADF/HTML processing for the rest
+MAX_COMMENTS_PER_ISSUE = 20
+
+# Transient statuses worth retrying with backoff
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 3
+
+# Keep connections alive so paginated calls multiplex over one TLS session
+CLIENT_LIMITS = httpx.Limits(
+    max_keepalive_connections=20, max_connections=50, keepalive_expiry=30
+)
+
+
 class JiraService:
     """A service class to interact with the Jira API."""
 
     def __init__(self, config: Config):
         """Initialize the Jira Service."""
         self.config = config
-        self.search_url = f"{config.jira_url}/rest/api/3/search/jql"
+        self.search_url = f"{config.jira_url}/rest/api/3/search"
         self.auth = (config.jira_email, config.jira_api_token)
+        self.cache = ResponseCache()
         self.jql_query = (
             f"assignee = '{config.assignee_account_id}' "
             "AND status in (Done, Closed, Resolved) "
             "AND resolutiondate >= startOfYear() ORDER BY created DESC"
         )
+        # One client per service instance so the connection pool survives
+        # across fetch calls
+        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        self._client = httpx.AsyncClient(
+            auth=self.auth, headers=headers, http2=True, timeout=30.0, limits=CLIENT_LIMITS
+        )
+
+    async def __aenter__(self) -> "JiraService":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        await self._client.aclose()
 
-    def fetch_all_issues(self) -> List[Dict[str, Any]]:
+    async def fetch_all_issues(self) -> List[Dict[str, Any]]:
         """
-        Fetch all pages of issue data using token-based pagination.
+        Fetch all pages of issue data using offset-based pagination.
+
+        The first request reveals the total issue count, so the remaining
+        pages are fetched concurrently instead of one at a time.
         """
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        # Only the fields we actually format; the issue key comes back at
+        # the top level regardless
         fields_to_request = [
-            "key", "summary", "comment", "description", self.config.ac_field_id
+            "summary", "comment", "description", self.config.ac_field_id
         ]
-
-        all_issues: List[Dict[str, Any]] = []
-        next_page_token: Optional[str] = None
         max_results = 100
 
         print(f"Fetching completed Jira tickets for the year for {self.config.jira_email}...", file=sys.stderr)
         print("Using query:", self.jql_query, file=sys.stderr)
-        with httpx.Client(auth=self.auth, headers=headers, timeout=30.0) as client:
-            while True:
-                payload: Dict[str, Any] = {
-                    "jql": self.jql_query,
-                    "fields": fields_to_request,
-                    "maxResults": max_results,
-                }
-                if next_page_token:
-                    payload["nextPageToken"] = next_page_token
-
-                try:
-                    response = client.post(self.search_url, json=payload)
-                    response.raise_for_status()
-                except httpx.HTTPStatusError as e:
-                    print(f"HTTP Error: {e.response.status_code} - {e.response.text}")
-                    raise
-                except httpx.RequestError as e:
-                    print(f"API Request Failed: {e}")
-                    raise
-
-                data = response.json()
-                issues_on_page = data.get("issues", [])
-                all_issues.extend(issues_on_page)
-
-                print(f"\rFetched {len(all_issues)} tickets...", end="", file=sys.stderr)
-
-                next_page_token = data.get("nextPageToken")
-                if not next_page_token:
-                    break  # No more pages
+        client = self._client
+        # Cap concurrent requests so parallel pagination stays under
+        # Jira's concurrency limits
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async def fetch_page(start_at: int) -> Dict[str, Any]:
+            cache_key = f"jira:{self.jql_query}:{start_at}"
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            payload: Dict[str, Any] = {
+                "jql": self.jql_query,
+                "fields": fields_to_request,
+                # Have Jira render the ADF fields server-side so the
+                # formatter doesn't have to walk the raw trees
+                "expand": ["renderedFields"],
+                "startAt": start_at,
+                "maxResults": max_results,
+            }
+            async with semaphore:
+                # Retry transient failures with exponential backoff,
+                # honoring Retry-After when the server sends one
+                for attempt in range(MAX_ATTEMPTS):
+                    try:
+                        response = await client.post(self.search_url, json=payload)
+                        if (
+                            response.status_code in RETRYABLE_STATUSES
+                            and attempt < MAX_ATTEMPTS - 1
+                        ):
+                            await asyncio.sleep(
+                                float(response.headers.get("Retry-After", 2 ** attempt))
+                            )
+                            continue
+                        response.raise_for_status()
+                        break
+                    except httpx.HTTPStatusError as e:
+                        print(f"HTTP Error: {e.response.status_code} - {e.response.text}")
+                        raise
+                    except httpx.RequestError as e:
+                        if attempt < MAX_ATTEMPTS - 1:
+                            await asyncio.sleep(2 ** attempt)
+                            continue
+                        print(f"API Request Failed: {e}")
+                        raise
+            # orjson decodes 100-issue pages full of ADF trees several
+            # times faster than the stdlib json used by response.json()
+            data = orjson.loads(response.content)
+            self.cache.set(cache_key, data)
+            return data
+
+        first_page = await fetch_page(0)
+        all_issues: List[Dict[str, Any]] = first_page.get("issues", [])
+        total = first_page.get("total", 0)
+        print(f"\rFetched {len(all_issues)} of {total} tickets...", end="", file=sys.stderr)
+
+        if total > max_results:
+            # return_exceptions keeps one failed page (post-retries) from
+            # cancelling its siblings and losing all fetched work
+            offsets = range(max_results, total, max_results)
+            pages = await asyncio.gather(
+                *(fetch_page(start_at) for start_at in offsets),
+                return_exceptions=True,
+            )
+            for start_at, data in zip(offsets, pages):
+                if isinstance(data, BaseException):
+                    print(f"\nWarning: skipping page at offset {start_at}: {data}", file=sys.stderr)
+                    continue
+                all_issues.extend(data.get("issues", []))
+                print(f"\rFetched {len(all_issues)} of {total} tickets...", end="", file=sys.stderr)
 
         print("\nAll tickets fetched. Now formatting for the LLM...", file=sys.stderr)
         return all_issues
 
 
+class AdfExtractor:
+    """Extracts plain text from Atlassian Document Format (ADF) trees.
+
+    Walks each tree iteratively with an explicit stack, which avoids a
+    Python function call per node and any recursion-limit risk on deeply
+    nested documents. The accumulator and stack lists are reused across
+    calls so extracting description, AC, and every comment of an issue
+    doesn't allocate fresh lists each time.
+    """
+
+    def __init__(self) -> None:
+        self._text_parts: List[str] = []
+        self._stack: List[Any] = []
+
+    def extract(self, adf_node: Optional[Dict[str, Any]]) -> str:
+        """Return the concatenated text content of one ADF subtree."""
+        text_parts = self._text_parts
+        stack = self._stack
+        text_parts.clear()
+        stack.append(adf_node)
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, dict):
+                continue
+            if node.get("type") == "text":
+                text_parts.append(node.get("text", ""))
+                continue
+            content = node.get("content")
+            if isinstance(content, list):
+                # Reversed so popping preserves document order
+                stack.extend(reversed(content))
+
+        return "".join(text_parts)
+
+
+_ADF_EXTRACTOR = AdfExtractor()
+
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+
 def get_adf_text(adf_node: Optional[Dict[str, Any]]) -> str:
-    """Recursively extract plain text from Atlassian Document Format (ADF)."""
-    if not isinstance(adf_node, dict):
-        return ""
+    """Extract plain text from an ADF node via the shared extractor."""
+    return _ADF_EXTRACTOR.extract(adf_node)
 
-    text_parts = []
-    if adf_node.get("type") == "text" and "text" in adf_node:
-        return adf_node.get("text", "")
 
-    if "content" in adf_node and isinstance(adf_node["content"], list):
-        for content_node in adf_node["content"]:
-            text_parts.append(get_adf_text(content_node))
+def strip_html(rendered: str) -> str:
+    """Reduce a server-rendered HTML field to plain text."""
+    return html.unescape(_HTML_TAG_RE.sub("", rendered)).strip()
 
-    return "".join(text_parts)
 
+def iter_issue_chunks(issues: List[Dict[str, Any]], ac_field_id: str) -> Iterator[str]:
+    """Yield one formatted LLM-prompt entry per fetched Jira issue.
 
-def format_issues_for_llm(issues: List[Dict[str, Any]], ac_field_id: str) -> str:
-    """Format the fetched Jira issues into a single string for the LLM."""
+    Yielding entries lets the caller stream them to disk instead of
+    holding the whole formatted output in memory.
+    """
     if not issues:
         print("No issues found. Check your JQL query or permissions.")
-        return ""
-
-    consolidated_data = []
-    i = 1
-    for issue in issues:
-        fields = issue.get("fields", {})
+        return
+
+    # Local aliases: LOAD_FAST inside the loop instead of a global
+    # lookup per call
+    _adf = get_adf_text
+    _strip = strip_html
+
+    for i, issue in enumerate(issues, 1):
+        fields = issue.get("fields") or {}
+        # Prefer the server-rendered HTML fields; fall back to walking
+        # the raw ADF trees if they weren't expanded
+        rendered = issue.get("renderedFields") or {}
         key = issue.get("key", "N/A")
         title = fields.get("summary", "N/A")
 
-        description = get_adf_text(fields.get("description")) or "No description."
+        rendered_description = rendered.get("description")
+        if rendered_description:
+            description = _strip(rendered_description) or "No description."
+        else:
+            description = _adf(fields.get("description")) or "No description."
 
-        ac_value = fields.get(ac_field_id)
-        ac = get_adf_text(ac_value) if isinstance(ac_value, dict) else (ac_value or "N/A")
+        ac_value = rendered.get(ac_field_id)
+        if isinstance(ac_value, str) and ac_value:
+            ac = _strip(ac_value) or "N/A"
+        else:
+            ac_value = fields.get(ac_field_id)
+            ac = _adf(ac_value) if isinstance(ac_value, dict) else (ac_value or "N/A")
 
-        entry = [
-            f"--- jira {i} ---",
-            f"Ticket: {key}",
-            f"Title: {title}",
-            f"Description:\n{description}\n",
-            f"Acceptance Criteria:\n{ac}\n",
-            "Comments:",
-        ]
-        i += 1
-        comments = fields.get("comment", {}).get("comments", [])
+        # Jira returns comments oldest-first, so slicing from the end
+        # keeps the most recent ones
+        comments = ((fields.get("comment") or {}).get("comments") or [])[-MAX_COMMENTS_PER_ISSUE:]
+        rendered_comments = ((rendered.get("comment") or {}).get("comments") or [])[-MAX_COMMENTS_PER_ISSUE:]
         if comments:
-            for comment in comments:
-                author = comment.get("author", {}).get("displayName", "Unknown")
-                body = get_adf_text(comment.get("body"))
-                entry.append(f"- {author}: {body}")
+            comment_lines = []
+            for idx, comment in enumerate(comments):
+                author = (comment.get("author") or {}).get("displayName", "Unknown")
+                rendered_body = (
+                    rendered_comments[idx].get("renderedBody") or rendered_comments[idx].get("body")
+                    if idx < len(rendered_comments) else None
+                )
+                if rendered_body:
+                    body = _strip(rendered_body)
+                else:
+                    body = _adf(comment.get("body"))
+                comment_lines.append(f"- {author}: {body}")
+            comments_text = "\n".join(comment_lines)
         else:
-            entry.append("- No comments found.")
+            comments_text = "- No comments found."
+
+        yield (
+            f"--- jira {i} ---\n"
+            f"Ticket: {key}\n"
+            f"Title: {title}\n"
+            f"Description:\n{description}\n\n"
+            f"Acceptance Criteria:\n{ac}\n\n"
+            "Comments:\n"
+            f"{comments_text}"
+        )
 
-        consolidated_data.append("\n".join(entry))
 
-    return "\n\n".join(consolidated_data)
+async def fetch_issues(config: Config) -> List[Dict[str, Any]]:
+    """Fetch completed issues, closing the service's client when done."""
+    async with JiraService(config) as jira_service:
+        return await jira_service.fetch_all_issues()
 
 
 def main() -> int:
     """Run the main script logic."""
     try:
         config = Config.from_env()
-        jira_service = JiraService(config)
 
-        all_issues = jira_service.fetch_all_issues()
-        jira_output = format_issues_for_llm(all_issues, config.ac_field_id)
+        all_issues = asyncio.run(fetch_issues(config))
 
-        if jira_output:
+        # Stream entries to disk as they are formatted rather than
+        # building the whole output string first
+        chunks = iter_issue_chunks(all_issues, config.ac_field_id)
+        first_chunk = next(chunks, None)
+        if first_chunk is not None:
             current_date = datetime.now().strftime('%Y-%m-%d')
             filename = f"jira_tickets_{current_date}.txt"
 
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(jira_output)
-                print(f"\nSuccessfully wrote ticket data to '{filename}'", file=sys.stderr)
+            # Binary mode skips TextIOWrapper's incremental encoder;
+            # each chunk is encoded once and written as-is
+            with open(filename, "wb") as f:
+                f.write(first_chunk.encode("utf-8"))
+                for chunk in chunks:
+                    f.write(b"\n\n")
+                    f.write(chunk.encode("utf-8"))
+            print(f"\nSuccessfully wrote ticket data to '{filename}'", file=sys.stderr)
 
         return 0
     except (ValueError, httpx.RequestError) as e:
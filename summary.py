@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fetches completed Jira tickets and merged GitHub Pull Requests for the
+year concurrently and writes both LLM-prompt files.
+"""
+import asyncio
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
+
+import httpx
+
+import github
+import jira
+
+
+async def fetch_both(
+    github_config: github.Config, jira_config: jira.Config
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Fetch GitHub PRs and Jira issues concurrently.
+
+    The two sources are independent, so running them together takes
+    roughly as long as the slower of the two instead of their sum.
+    """
+    async with github.GitHubService(github_config) as github_service, \
+            jira.JiraService(jira_config) as jira_service:
+        return await asyncio.gather(
+            github_service.fetch_merged_prs_for_year(),
+            jira_service.fetch_all_issues(),
+        )
+
+
+def write_entries(filename: str, chunks: Iterator[str]) -> bool:
+    """Stream formatted entries to `filename`; return False if empty."""
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return False
+
+    with open(filename, "wb") as f:
+        f.write(first_chunk.encode("utf-8"))
+        for chunk in chunks:
+            f.write(b"\n\n")
+            f.write(chunk.encode("utf-8"))
+    return True
+
+
+def main() -> int:
+    """Run the main script logic."""
+    try:
+        github_config = github.Config.from_env()
+        jira_config = jira.Config.from_env()
+
+        all_prs, all_issues = asyncio.run(fetch_both(github_config, jira_config))
+
+        current_date = datetime.now().strftime('%Y-%m-%d')
+
+        github_filename = f"github_contributions_{current_date}.txt"
+        if write_entries(github_filename, github.iter_pr_chunks(all_prs, github_config)):
+            print(f"\nSuccessfully wrote contribution data to '{github_filename}'", file=sys.stderr)
+
+        jira_filename = f"jira_tickets_{current_date}.txt"
+        if write_entries(jira_filename, jira.iter_issue_chunks(all_issues, jira_config.ac_field_id)):
+            print(f"\nSuccessfully wrote ticket data to '{jira_filename}'", file=sys.stderr)
+
+        return 0
+    except (ValueError, httpx.RequestError) as e:
+        print(f"\nAn error occurred: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())